@@ -59,6 +59,8 @@ def def_mod_var(caller, self): # define function
 		uman_up = 1
 	# integration tolerances (absolute first, relative second)
 	int_tol = [1.e-3, 1.e-4] 
+	# method for integrating the ODEs (BDF, LSODA or Rosenbrock)
+	self.ode_solver = 'BDF'
 	self.testf = 0 # whether in testing mode or not
 	self.pars_skip = 0 # whether to skip chemical scheme parsing
 	self.spin_up = 0 # whether to spin up chemistry
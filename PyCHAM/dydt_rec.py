@@ -24,7 +24,7 @@
 # changes due to gas-phase photochemistry and partitioning are included; 
 # generated in init_conc and treats loss from gas-phase as negative
 
-# File Created at 2024-08-09 04:40:48.364011
+# File Created at 2026-10-18 19:41:36.085902
 
 import numpy as np 
 
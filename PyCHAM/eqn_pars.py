@@ -35,6 +35,7 @@ import write_rate_file
 import write_hyst_eq
 import jac_setup
 import aq_mat_prep
+import stoi_mat_prep
 
 # define function to extract the chemical mechanism
 def extr_mech(int_tol, num_sb, drh_str, erh_str, self):
@@ -224,6 +225,9 @@ def extr_mech(int_tol, num_sb, drh_str, erh_str, self):
 	# ensure integer
 	self.con_infl_indx = self.con_infl_indx.astype('int')
 	
+	# prepare constant stoichiometry matrices for the ode solver
+	[] = stoi_mat_prep.stoi_mat_prep(self)
+
 	[rowvals, colptrs, self] = jac_setup.jac_setup(comp_num, num_sb, 
 		(num_sb-self.wall_on), self)
 
@@ -21,7 +21,7 @@
 ##########################################################################################
 '''solution of deliquescence and efflorescence RH, generated by eqn_pars.py in fully functioning mode, or by ui_check.py in testing mode'''
 # module to estimate deliquescence and efflorescence relative humidity as a function of temperature
-# File Created at 2024-08-09 04:40:48.364505
+# File Created at 2026-10-18 19:41:35.371188
 
 # function for deliquescence
 def drh(TEMP):
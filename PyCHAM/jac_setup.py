@@ -808,7 +808,37 @@ def jac_setup(comp_num, num_sb, num_asb, self):
 	self.jac_part_indx = self.jac_part_indx.astype(int)
 	self.jac_wall_indx = self.jac_wall_indx.astype(int)	
 	self.jac_extr_indx = self.jac_extr_indx.astype(int)
-	rowvals = rowvals.astype(int)	
+	rowvals = rowvals.astype(int)
 	colptrs = colptrs.astype(int)
-	
+
+	# scatter map for gas-phase reactions ---------------------------
+	# flatten the per-reaction Jacobian inputs into one element per
+	# affected Jacobian entry, so that the Jacobian function of
+	# ode_solv can fill all gas-phase reaction contributions in one
+	# vectorised pass, rather than looping through reactions.  Note
+	# that this must come after all adjustments to self.jac_indx_g above
+	if (self.eqn_num[0] > 0): # if gas-phase reactions present
+
+		# reactant indices per reaction, with unused (filler)
+		# elements pointing to the final element of a concentration
+		# array that has a value of one appended to its end
+		rmask = (np.arange(self.rindx_g.shape[1]).reshape(1, -1) <
+			self.nreac_g.reshape(-1, 1))
+		self.jac_rindx_g = np.where(rmask, self.rindx_g, -1).astype(int)
+
+		# Jacobian elements in use per reaction, note that row-major
+		# ordering is kept so that elements sum in the same order as
+		# the reaction loop this replaces
+		jmask = (np.arange(self.jac_indx_g.shape[1]).reshape(1, -1) <
+			self.njac_g.reshape(-1, 1))
+		# reaction index for each Jacobian element
+		self.jac_rr_indx_g = (np.where(jmask)[0]).astype(int)
+		# stoichiometry for each Jacobian element
+		self.jac_stoi_flat_g = self.jac_stoi_g[jmask]
+		# index of component that is the denominator for each
+		# Jacobian element
+		self.jac_den_flat_g = (self.jac_den_indx_g[jmask]).astype(int)
+		# index of sparse Jacobian data array for each element
+		self.jac_data_indx_g = (self.jac_indx_g[jmask]).astype(int)
+
 	return(rowvals, colptrs, self)
@@ -906,6 +906,10 @@ def mod_var_read(self):
 			if key == 'int_tol' and (value.strip()): # tolerances for integration
 				int_tol = [float(i) for i in (value.split(','))]
 
+			# method for integrating the ODEs
+			if key == 'ode_solver' and (value.strip()):
+				self.ode_solver = str(value.strip())
+
 			# radius of newly nucleated particles (cm)
 			if key == 'new_partr' and (value.strip()):
 				new_partr = float(value.strip())
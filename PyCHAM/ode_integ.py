@@ -0,0 +1,380 @@
+########################################################################
+#								       #
+# Copyright (C) 2018-2024					       #
+# Simon O'Meara : simon.omeara@manchester.ac.uk			       #
+#								       #
+# All Rights Reserved.                                                 #
+# This file is part of PyCHAM                                          #
+#                                                                      #
+# PyCHAM is free software: you can redistribute it and/or modify it    #
+# under the terms of the GNU General Public License as published by    #
+# the Free Software Foundation, either version 3 of the License, or    #
+# (at  your option) any later version.                                 #
+#                                                                      #
+# PyCHAM is distributed in the hope that it will be useful, but        #
+# WITHOUT ANY WARRANTY; without even the implied warranty of           #
+# MERCHANTABILITY or## FITNESS FOR A PARTICULAR PURPOSE.  See the GNU  #
+# General Public License for more details.                             #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with PyCHAM.  If not, see <http://www.gnu.org/licenses/>.      #
+#                                                                      #
+'''persistent integration of the ODEs across operator-split intervals'''
+# the ODE solver module (ode_solv) integrates over one operator-split
+# interval at a time, here the integration method chosen by the 
+# ode_solver model variable (self.ode_solver) is applied: the backward 
+# differentiation formula (BDF) of scipy, LSODA of scipy or a native 
+# Rosenbrock-W method using the sparse Jacobian.  Starting a new 
+# integration would throw away the step size (and for BDF the order and
+# history), making it restart at a small step, so here these at the 
+# end of one interval are kept (in self.ode_state) and used to 
+# warm-start the next interval, with ode_updater resetting this state 
+# on discontinuities (e.g. injections) and a fresh start also made when
+# operator-split processes have changed concentrations by more than the
+# integration tolerances.  The numbers of accepted steps, rejected 
+# steps (counted for the Rosenbrock method only, since not given by 
+# scipy), function evaluations, Jacobian evaluations and LU 
+# decompositions are accumulated in self.ode_cnts
+
+import numpy as np
+from scipy.integrate import BDF, LSODA
+import scipy.sparse as SP
+from scipy.sparse.linalg import splu
+
+# coefficients of the four-stage, third-order Rosenbrock-W method 
+# (ROS34PW2) of Rang and Angermann (2005), 
+# doi.org/10.1007/s10543-005-2635-y, which keeps its order with an 
+# approximate Jacobian (the Jacobian of PyCHAM omits terms for 
+# components with zero concentration and for the dependence of rate 
+# coefficients on concentrations), with the embedded second-order 
+# solution for error estimation
+ros_gam = 0.435866521508459 # diagonal gamma
+# coefficients for stage concentrations
+ros_alp = np.array(([0., 0., 0.], 
+	[0.87173304301691801, 0., 0.], 
+	[0.84457060015369423, -0.11299064236484185, 0.], 
+	[0., 0., 1.]))
+# coefficients for stage Jacobian terms
+ros_gamij = np.array(([0., 0., 0.], 
+	[-0.87173304301691801, 0., 0.], 
+	[-0.90338057013044082, 0.054180672388095326, 0.], 
+	[0.24212380706095346, -1.2232505839045147, 0.54526025533510214]))
+# coefficients for new step solution
+ros_b = np.array((0.24212380706095346, -1.2232505839045147, 
+	1.5452602553351020, 0.435866521508459))
+# coefficients for embedded solution
+ros_bh = np.array((0.37810903145819369, -0.096042292212423178, 0.5, 
+	0.2179332607542295))
+
+def ode_integ(dydt, jac, y, integ_step, atol, rtol, self):
+
+	# inputs: ---------------------------------------------
+	# dydt - function for rate of change of concentrations
+	# jac - function for Jacobian of dydt
+	# y - concentrations at start of interval (# molecules/cm3)
+	# integ_step - interval to integrate over (s)
+	# atol - absolute tolerance
+	# rtol - relative tolerance
+	# self.ode_solver - name of integration method
+	# self.ode_state - name of integration method, step size 
+	#	and, for BDF, order, equal step count, 
+	#	tolerances and differences array at end of previous 
+	#	interval, or None if the integrator is to be reset
+	# self.ode_cnts - accepted steps, rejected steps, function 
+	#	evaluations, Jacobian evaluations and LU 
+	#	decompositions so far
+	# self - reference to PyCHAM
+	# -----------------------------------------------------
+
+	if (hasattr(self, 'ode_solver') == False):
+		self.ode_solver = 'BDF'
+	if (hasattr(self, 'ode_state') == False):
+		self.ode_state = None
+	if (hasattr(self, 'ode_cnts') == False):
+		self.ode_cnts = np.zeros((5), dtype='int')
+
+	# state from a different method can't be used
+	if (self.ode_state is not None):
+		if (self.ode_state[0] != self.ode_solver):
+			self.ode_state = None
+
+	if (self.ode_solver == 'LSODA'):
+		[y_end, t_end, status] = lsoda_run(dydt, jac, y, integ_step, 
+			atol, rtol, self)
+	if (self.ode_solver == 'Rosenbrock'):
+		[y_end, t_end, status] = ros_run(dydt, jac, y, integ_step, 
+			atol, rtol, self)
+	if (self.ode_solver == 'BDF'):
+		[y_end, t_end, status] = bdf_run(dydt, jac, y, integ_step, 
+			atol, rtol, self)
+
+	return(y_end, t_end, status)
+
+# integrate using the backward differentiation formula
+def bdf_run(dydt, jac, y, integ_step, atol, rtol, self):
+
+	# inputs: ---------------------------------------------
+	# as for ode_integ
+	# -----------------------------------------------------
+
+	# whether to warm-start from the previous interval, which requires 
+	# the same number of concentrations and the same tolerances
+	warm = 0
+	if (self.ode_state is not None):
+		[meth, h_abs, order, n_equal_steps, atol0, rtol0, D] = self.ode_state
+		if (D.shape[1] == len(y) and atol0 == atol and rtol0 == rtol):
+			# concentrations changed by operator-split processes 
+			# (e.g. coagulation) since the end of the previous interval
+			# relative to the error tolerance, where these changes 
+			# exceed the tolerance the history is treated as 
+			# discontinuous
+			err = (y-D[0])/(atol+rtol*np.abs(y))
+			if ((np.sum(err**2)/len(y))**0.5 <= 1.):
+				warm = 1
+
+	try:
+		solver = integ_run(dydt, jac, y, integ_step, atol, rtol, warm, self)
+	except:
+		if (warm == 0): # if not warm-started then report failure
+			raise
+		solver = None
+
+	# if the warm-started integration was unsuccessful (e.g. due to a 
+	# singular matrix for the step size carried over), then try again 
+	# without warm-start
+	if (warm == 1 and (solver is None or solver.status == 'failed')):
+		solver = integ_run(dydt, jac, y, integ_step, atol, rtol, 0, self)
+	
+	cnt_add(solver, self) # keep count of steps and evaluations
+	
+	if (solver.status == 'failed'): # if integration failed
+		self.ode_state = None # reset integrator
+		return(y, 0., -1)
+
+	# keep step size, order and history for next interval, note that 
+	# the differences array is consistent with the final step size
+	self.ode_state = ['BDF', solver.h_abs, solver.order, 
+		solver.n_equal_steps, atol, rtol, np.copy(solver.D)]
+
+	return(solver.y, solver.t, 0)
+
+# integrate over the interval, with or without warm-start
+def integ_run(dydt, jac, y, integ_step, atol, rtol, warm, self):
+
+	# inputs: ---------------------------------------------
+	# as for ode_integ, plus:
+	# warm - flag for whether to warm-start from self.ode_state
+	# -----------------------------------------------------
+
+	# prepare the integrator, note that the Jacobian is evaluated 
+	# here with the current inputs (e.g. rate coefficients)
+	solver = BDF(dydt, 0., y, integ_step, atol = atol, rtol = rtol, 
+		vectorized = True, jac = jac)
+
+	if (warm == 1): # warm-start from the previous interval
+		[meth, h_abs, order, n_equal_steps, atol0, rtol0, D] = self.ode_state
+		solver.h_abs = h_abs
+		solver.order = order
+		solver.n_equal_steps = n_equal_steps
+		solver.D[:] = D[:]
+		# the history starts from the current concentrations, 
+		# which may have been changed (within tolerance) by 
+		# operator-split processes
+		solver.D[0] = y
+
+	solver.nstep = 0 # count of accepted steps
+	while (solver.status == 'running'): # step to end of interval
+		solver.step()
+		solver.nstep += 1
+
+	return(solver)
+
+# integrate using LSODA
+def lsoda_run(dydt, jac, y, integ_step, atol, rtol, self):
+
+	# inputs: ---------------------------------------------
+	# as for ode_integ
+	# -----------------------------------------------------
+
+	# LSODA requires a dense Jacobian, note that scipy doesn't count 
+	# Jacobian evaluations for LSODA, so these are counted here, and
+	# LSODA decomposes the iteration matrix with each evaluation
+	njev = np.zeros((1), dtype='int')
+	def jac_dense(t, y):
+		njev[0] += 1
+		return(jac(t, y).toarray())
+
+	solver = LSODA(dydt, 0., y, integ_step, atol = atol, rtol = rtol, 
+		vectorized = True, jac = jac_dense)
+
+	solver.nstep = 0 # count of accepted steps
+	while (solver.status == 'running'): # step to end of interval
+		solver.step()
+		solver.nstep += 1
+
+	solver.njev = njev[0]
+	solver.nlu = njev[0]
+	cnt_add(solver, self) # keep count of steps and evaluations
+
+	if (solver.status == 'failed'): # if integration failed
+		return(y, 0., -1)
+
+	return(solver.y, solver.t, 0)
+
+# add steps and evaluations of a scipy solver to the counts
+def cnt_add(solver, self):
+
+	# inputs: ---------------------------------------------
+	# solver - scipy solver after integration
+	# self - reference to PyCHAM
+	# -----------------------------------------------------
+
+	self.ode_cnts[0] += solver.nstep
+	self.ode_cnts[2] += solver.nfev
+	self.ode_cnts[3] += solver.njev
+	self.ode_cnts[4] += solver.nlu
+
+	return()
+
+# integrate using the Rosenbrock-W method with sparse Jacobian
+def ros_run(dydt, jac, y, integ_step, atol, rtol, self):
+
+	# inputs: ---------------------------------------------
+	# as for ode_integ
+	# -----------------------------------------------------
+
+	# the rate of change function takes concentrations with 
+	# shape (number of concentrations, 1)
+	def f(t, y):
+		self.ode_cnts[2] += 1
+		return(dydt(t, y.reshape(-1, 1)).reshape(-1))
+
+	n = len(y)
+	ident = SP.identity(n, format='csc')
+	t = 0. # time through interval (s)
+	tfin = integ_step # time at end of interval (s)
+	# minimum step size (s), below which integration has failed, 
+	# set by the precision of time through the interval
+	hmin = 10.*np.finfo(float).eps*tfin
+
+	f0 = f(t, y)
+
+	# step size (s) carried over from previous interval, otherwise
+	# estimated from the scaled concentrations and their rates of 
+	# change (as in Hairer et al. (1993))
+	if (self.ode_state is not None):
+		h = self.ode_state[1]
+	else:
+		sc = atol+rtol*np.abs(y)
+		d0 = (np.sum((y/sc)**2)/n)**0.5
+		d1 = (np.sum((f0/sc)**2)/n)**0.5
+		if (d0 < 1.e-5 or d1 < 1.e-5):
+			h = 1.e-6
+		else:
+			h = 0.01*d0/d1
+	h = min(max(h, hmin), tfin)
+
+	rej_last = 0 # whether last attempted step rejected
+	nstep = 0 # count of accepted steps in this interval
+
+	while (t < tfin): # step to end of interval
+
+		# don't step past the end of the interval, noting that
+		# step size carries over from before reduction
+		h_try = min(h, tfin-t)
+		
+		# Jacobian at start of step, which is kept for 
+		# any rejected attempts, note that the Jacobian of PyCHAM 
+		# divides reaction rates by reactant concentrations, so omits 
+		# terms for reactants with zero concentration, which are 
+		# recovered by evaluating with a negligible concentration 
+		# in place of zero
+		yj = np.copy(y)
+		yj[yj == 0.] = 1.e-30
+		J = jac(t, yj)
+		self.ode_cnts[3] += 1
+
+		while True: # attempt step until accepted
+
+			# decomposition of the matrix for this step size,
+			# shared by all stages
+			lu = splu((ident-(h_try*ros_gam)*J).tocsc())
+			self.ode_cnts[4] += 1
+
+			# stages
+			K = np.zeros((4, n))
+			for si in range(4):
+				if (si == 0): # first stage uses start of step
+					fi = f0
+					Ji = 0.
+				else:
+					fi = f(t+h_try, y+ros_alp[si, 0:si].dot(K[0:si, :]))
+					Ji = J.dot(ros_gamij[si, 0:si].dot(K[0:si, :]))
+				K[si, :] = lu.solve(h_try*(fi+Ji))
+
+			# new concentrations and error estimate
+			y_new = y+ros_b.dot(K)
+			# error estimate, filtered through the decomposed matrix 
+			# to damp the contribution of very stiff components (e.g. 
+			# particle-phase components relaxing to equilibrium after 
+			# operator-split processes) (Shampine (1982), 
+			# doi.org/10.1145/355993.355994)
+			y_err = lu.solve((ros_b-ros_bh).dot(K))
+			sc = atol+rtol*np.maximum(np.abs(y), np.abs(y_new))
+			err = (np.sum((y_err/sc)**2)/n)**0.5
+			if (np.isfinite(err) == False):
+				err = 1.e10 # treat as large error
+			
+			# the Rosenbrock method doesn't preserve positivity, so 
+			# negative concentrations beyond the absolute tolerance
+			# are treated as error
+			if (any(y_new < -atol)):
+				err = max(err, 2.)
+
+			import os, sys
+			if os.environ.get("RDBG"): e=np.abs(y_err/sc); ii=np.argsort(e)[::-1][:3]; print("DBG", t, h_try, err, ii, e[ii], y[ii], y_new[ii], file=sys.stderr)
+			# factor for new step size
+			fac = min(6., max(0.2, 0.9*max(err, 1.e-10)**(-1./3.)))
+
+			if (err <= 1.): # accept step
+				t += h_try
+				y = y_new
+				nstep += 1
+				# don't increase step straight after a rejection
+				if (rej_last == 1):
+					fac = min(fac, 1.)
+				rej_last = 0
+				# step size for next step, unless shortened to 
+				# reach end of interval
+				if (h_try == h or fac < 1.):
+					h = h_try*fac
+				if (t < tfin):
+					f0 = f(t, y)
+				break
+			
+			else: # reject step
+				self.ode_cnts[1] += 1
+				rej_last = 1
+				# reduce strongly if first step of a new start
+				if (nstep == 0 and self.ode_state is None):
+					h_try = h_try*0.1
+				else:
+					h_try = h_try*fac
+				h = h_try
+				if (h_try < hmin): # integration failed
+					self.ode_cnts[0] += nstep
+					self.ode_state = None
+					return(y, 0., -1)
+
+	self.ode_cnts[0] += nstep
+
+	# negative concentrations within the absolute tolerance are set 
+	# to zero, since ode_updater requires non-negative results, note 
+	# that this isn't done on each step as the Jacobian omits 
+	# terms for components with zero concentration
+	y[y < 0.] = 0.
+
+	# keep step size for next interval
+	self.ode_state = ['Rosenbrock', h]
+
+	return(y, t, 0)
@@ -409,6 +409,13 @@ def ode_updater(y, H2Oi,
 	importlib.reload(ode_solv_wat) # import most recent version
 	importlib.reload(dydt_rec) # import most recent version
 	
+	# start the ODE integrator afresh, with no step size or 
+	# history carried over (see ode_integ)
+	self.ode_state = None
+	# counts of accepted steps, rejected steps, function 
+	# evaluations, Jacobian evaluations and LU decompositions
+	self.ode_cnts = np.zeros((5), dtype='int')
+	
 	while (self.tot_time-sumt) > (self.tot_time/1.e10):
 		
 		# remembering variables at the start of the 
@@ -517,6 +524,14 @@ def ode_updater(y, H2Oi,
 			act_coeff, tot_in_res, Compti, self, vol_Comp, 
 			volP, ic_red)
 
+			# reset the warm-started ODE integrator (ode_integ) 
+			# following discontinuities in concentrations due to 
+			# injection of components or particles, or when 
+			# re-attempting an interval following instability
+			if (gpp_stab == -1 or gasinj_cnt != gasinj_cnt0 or 
+				seedt_cnt != seedt_cnt0):
+				self.ode_state = None
+
 			# ------------------------------------------------------------
 			# if particles and/or wall present		
 			if ((num_sb-self.wall_on) > 0 or self.wall_on > 0):
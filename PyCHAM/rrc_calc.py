@@ -28,6 +28,7 @@
 import numpy as np
 import scipy.constants as si
 import importlib
+import os
 try:
 	import rate_coeffs
 except:
@@ -93,10 +94,82 @@ def rrc_calc(H2O, TEMP, y, PInit, Jlen, NO, HO2, NO3, sumt, self):
 	N2_val = M_val*0.7809
 	O2_val = M_val*0.2095
 	
-	importlib.reload(rate_coeffs) # ensure latest version uploaded
+	# flag which dependencies of rate coefficients have changed 
+	# since the previous call, so that only reactions depending on 
+	# these are refreshed (see rrc_class)
+	rrc_refresh(TEMP, M_val, H2O, RO2, NO, HO2, NO3, self)
+
+	# get the rate coefficient function, only reloading the 
+	# module if it has been regenerated since last loaded
+	evaluate_rates = rrc_func(rate_coeffs, self)
+	
 	# calculate the new rate coefficient array (/s) 
-	[rrc, erf, err_mess] = rate_coeffs.evaluate_rates(RO2, H2O, 
+	[rrc, erf, err_mess] = evaluate_rates(RO2, H2O, 
 		TEMP, time, M_val, N2_val, O2_val, Jlen, NO, HO2, NO3, 
 		sumt, self)
 	
 	return(rrc, erf, err_mess)
+
+# function to return the compiled rate coefficient function, reloading
+# the generated module only when its file has changed
+def rrc_func(rate_coeffs, self):
+
+	# inputs: ---------------------------------------------
+	# rate_coeffs - the generated rate coefficient module
+	# self.rrc_stamp - modification time (ns) and size (bytes) of 
+	#	the rate coefficient file when last loaded, reset to None by 
+	#	write_rate_file whenever the file is regenerated
+	# self.rrc_evaluate - the cached rate coefficient function
+	# -----------------------------------------------------
+
+	# modification time and size of generated file
+	st = os.stat(rate_coeffs.__file__)
+	stamp = (st.st_mtime_ns, st.st_size)
+
+	# reload only if file not yet loaded or since changed
+	if (hasattr(self, 'rrc_stamp') == False or self.rrc_stamp != stamp):
+		importlib.reload(rate_coeffs) # ensure latest version uploaded
+		self.rrc_evaluate = rate_coeffs.evaluate_rates
+		self.rrc_stamp = stamp
+	
+	return(self.rrc_evaluate)
+
+# function to flag which inputs to rate coefficients have changed
+def rrc_refresh(TEMP, M_val, H2O, RO2, NO, HO2, NO3, self):
+
+	# inputs: ---------------------------------------------
+	# TEMP - temperature (K)
+	# M_val - third body concentration (# molecules/cm3)
+	# H2O - concentration of water (# molecules/cm3)
+	# RO2 - concentration of alkyl peroxy radicals (# molecules/cm3)
+	# NO, HO2, NO3 - concentrations (# molecules/cm3)
+	# self.light_stat_now - whether lights off (0) or on (>0)
+	# self.rrc_tab_prev - inputs at the previous call
+	# -----------------------------------------------------
+
+	# current inputs, note light status included so that photolysis
+	# dependent rate coefficients are zeroed when lights turn off
+	now = np.array(([TEMP, M_val, H2O, RO2, NO, HO2, NO3, 
+		self.light_stat_now])).astype('float').reshape(-1)
+
+	if (hasattr(self, 'rrc_tab_prev') == False or 
+		self.rrc_tab_prev is None): # if no previous inputs
+		self.rrc_tab_refresh = -1
+	else:
+		chng = (now != self.rrc_tab_prev)
+		self.rrc_tab_refresh = 32 # reactions evaluated every call
+		if (chng[0] or chng[1]): # temperature and/or pressure
+			self.rrc_tab_refresh += 1
+		if (chng[2]): # water
+			self.rrc_tab_refresh += 2
+		if (chng[3]): # alkyl peroxy radicals
+			self.rrc_tab_refresh += 4
+		# photolysis rates change with time whilst lights on
+		if (chng[7] or self.light_stat_now != 0):
+			self.rrc_tab_refresh += 8
+		if (any(chng[4:7])): # NO, HO2 or NO3
+			self.rrc_tab_refresh += 16
+
+	self.rrc_tab_prev = now
+
+	return()
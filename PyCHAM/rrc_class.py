@@ -0,0 +1,439 @@
+########################################################################
+#								       #
+# Copyright (C) 2018-2024					       #
+# Simon O'Meara : simon.omeara@manchester.ac.uk			       #
+#								       #
+# All Rights Reserved.                                                 #
+# This file is part of PyCHAM                                          #
+#                                                                      #
+# PyCHAM is free software: you can redistribute it and/or modify it    #
+# under the terms of the GNU General Public License as published by    #
+# the Free Software Foundation, either version 3 of the License, or    #
+# (at  your option) any later version.                                 #
+#                                                                      #
+# PyCHAM is distributed in the hope that it will be useful, but        #
+# WITHOUT ANY WARRANTY; without even the implied warranty of           #
+# MERCHANTABILITY or## FITNESS FOR A PARTICULAR PURPOSE.  See the GNU  #
+# General Public License for more details.                             #
+#                                                                      #
+# You should have received a copy of the GNU General Public License    #
+# along with PyCHAM.  If not, see <http://www.gnu.org/licenses/>.      #
+#                                                                      #
+'''classifying reaction rate coefficient expressions for array evaluation'''
+# at parse time, the gas-phase rate coefficient expression of each 
+# reaction is broken down into a sum of terms of the form:
+# A*numpy.exp(B/TEMP)*(TEMP/T0)**n*(product of named values), where 
+# named values are generic rate coefficients (e.g. KRO2NO), inputs to 
+# rate_coeffs.evaluate_rates (e.g. RO2, M, H2O) and photolysis rates 
+# (J[i]), the parameters of these terms are held in tables so that 
+# all reactions can be evaluated by a single numpy expression in 
+# rrc_eval, with any expressions not of this form (custom 
+# expressions) left to be written as code by write_rate_file.
+# Each reaction is also tagged with the inputs it depends on, as the 
+# sum of the following flags, so that rrc_eval need only refresh 
+# reactions whose inputs have changed (see rrc_calc):
+# 0 - constant
+# 1 - temperature and/or pressure (TEMP, M, N2, O2)
+# 2 - water (H2O)
+# 4 - total alkyl peroxy radicals (RO2)
+# 8 - photolysis (J)
+# 16 - NO, HO2 or NO3
+# 32 - other (refreshed every call)
+
+import numpy as np
+import ast
+
+# flags for the dependency of named inputs
+dep_flag = {'TEMP' : 1, 'M' : 1, 'N2' : 1, 'O2' : 1, 'H2O' : 2, 'RO2' : 4, 
+	'J' : 8, 'NO' : 16, 'HO2' : 16, 'NO3' : 16}
+
+def rrc_class(reac_coef, rrc, rrc_name, self):
+
+	# inputs: ---------------------------------------------
+	# reac_coef - rate coefficient expressions (strings) per reaction
+	# rrc - expressions for generic rate coefficients (strings of 
+	#	form name = expression)
+	# rrc_name - names of generic rate coefficients
+	# self - reference to PyCHAM
+	# -----------------------------------------------------
+
+	# names of values that terms may be multiplied by, note that the 
+	# order here must match the order in which write_rate_file 
+	# gathers these values inside rate_coeffs.evaluate_rates, and 
+	# that these names are followed by a value of one (for filling 
+	# unused slots) and then the photolysis rates
+	self.rrc_tab_names = list(rrc_name) + ['RO2', 'H2O', 'M', 'N2', 'O2', 
+		'NO', 'HO2', 'NO3']
+	# dictionary for index of names
+	name_indx = {}
+	for i, name in enumerate(self.rrc_tab_names):
+		if name not in name_indx: # keep first occurrence
+			name_indx[name] = i
+	
+	# index of value one (filler)
+	one_indx = len(self.rrc_tab_names)
+	# index of first photolysis rate in the value array
+	J0 = one_indx + 1
+
+	# dependency flags of named values, starting with the inputs to 
+	# rate_coeffs.evaluate_rates and then generic rate coefficients 
+	# (which depend on whatever their expressions contain)
+	name_dep = dict(dep_flag)
+	for line in rrc:
+		if ('=' not in line):
+			continue
+		name = line.split('=')[0].strip()
+		name_dep[name] = expr_dep(line[line.index('=')+1::], name_dep)
+	vdep = np.array(([name_dep.get(name, 32) for name in 
+		self.rrc_tab_names] + [0])).astype('int')
+
+	# lists for term parameters
+	reac = [] # reaction index
+	A = [] # pre-exponential factor
+	B = [] # exponential numerator (K)
+	T0 = [] # reference temperature (K)
+	n = [] # temperature exponent
+	vindx = [] # index of named values multiplying term
+	
+	code_indx = [] # index of reactions remaining as code
+
+	# dependency flags per reaction, with reactions left as code 
+	# given flag 32 as they are evaluated every call
+	self.rrc_tab_dep = np.zeros((len(reac_coef))).astype('int')
+
+	for ri in range(len(reac_coef)): # loop through reactions
+
+		terms = expr_terms(reac_coef[ri], name_indx, J0)
+	
+		if (terms is None): # if custom expression
+			code_indx.append(ri)
+			self.rrc_tab_dep[ri] = 32
+			continue
+
+		for term in terms: # loop through terms
+			reac.append(ri)
+			A.append(term[0])
+			B.append(term[1])
+			T0.append(term[2])
+			n.append(term[3])
+			vindx.append(term[4])
+			
+			# combine dependencies of this term with reaction
+			if (term[1] != 0. or term[3] != 0.):
+				self.rrc_tab_dep[ri] = (self.rrc_tab_dep[ri] | 1)
+			for vi in term[4]:
+				if (vi >= J0):
+					self.rrc_tab_dep[ri] = (self.rrc_tab_dep[ri] | 8)
+				else:
+					self.rrc_tab_dep[ri] = (self.rrc_tab_dep[ri] | vdep[vi])
+
+	# pad named value indices with the index of the value one
+	nslot = max([len(i) for i in vindx]+[1])
+	self.rrc_tab_vindx = np.ones((len(vindx), nslot)).astype('int')*one_indx
+	for ti in range(len(vindx)):
+		self.rrc_tab_vindx[ti, 0:len(vindx[ti])] = vindx[ti]
+	self.rrc_tab_one = one_indx
+	
+	self.rrc_tab_reac = np.array((reac)).astype('int')
+	self.rrc_tab_A = np.array((A)).astype('float')
+	self.rrc_tab_B = np.array((B)).astype('float')
+	self.rrc_tab_T0 = np.array((T0)).astype('float')
+	self.rrc_tab_n = np.array((n)).astype('float')
+	self.rrc_tab_nreac = len(reac_coef)
+
+	# prepare for evaluation: the sets of terms evaluated for each 
+	# combination of refreshed dependencies (built as needed by 
+	# rrc_eval), the flags of dependencies to refresh (-1 for all), 
+	# the most recent rate coefficients and the inputs they were 
+	# found with (see rrc_calc)
+	self.rrc_tab_sets = {}
+	self.rrc_tab_refresh = -1
+	self.rrc_tab_last = None
+	self.rrc_tab_prev = None
+
+	return(code_indx)
+
+# dependency flags of an expression, given dependency flags of names
+def expr_dep(expr, name_dep):
+
+	# inputs: ---------------------------------------------
+	# expr - expression (string)
+	# name_dep - dictionary of dependency flags of names
+	# -----------------------------------------------------
+
+	try:
+		node = ast.parse(expr.strip(), mode = 'eval')
+	except:
+		return(32)
+	
+	dep = 0
+	for sub in ast.walk(node):
+		if (isinstance(sub, ast.Attribute) and isinstance(sub.value, ast.Name) 
+			and sub.value.id in ['numpy', 'np']):
+			continue # numpy functions
+		if (isinstance(sub, ast.Name) and sub.id not in ['numpy', 'np']):
+			dep = (dep | name_dep.get(sub.id, 32))
+	
+	return(dep)
+
+# break an expression into its terms, returning None if the expression 
+# is not a sum of terms of the supported form
+def expr_terms(expr, name_indx, J0):
+
+	# inputs: ---------------------------------------------
+	# expr - rate coefficient expression (string)
+	# name_indx - dictionary of index of named values
+	# J0 - index of first photolysis rate in value array
+	# -----------------------------------------------------
+
+	try:
+		node = ast.parse(expr.strip(), mode = 'eval').body
+	except:
+		return(None)
+
+	# split into terms with signs
+	tnodes = []
+	if (term_split(node, 1., tnodes) == 0):
+		return(None)
+
+	terms = []
+	for [sign, tnode] in tnodes:
+		# term parameters: A, B, T0, n, named value indices
+		term = [sign, 0., 1., 0., []]
+		if (factor_add(tnode, term, name_indx, J0) == 0):
+			return(None)
+		terms.append(term)
+
+	return(terms)
+
+# split an expression into additive terms, returning 0 on failure
+def term_split(node, sign, tnodes):
+
+	if (isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub))):
+		if (term_split(node.left, sign, tnodes) == 0):
+			return(0)
+		if (isinstance(node.op, ast.Sub)):
+			return(term_split(node.right, -sign, tnodes))
+		return(term_split(node.right, sign, tnodes))
+	
+	# a negated expression that is not simply a number
+	if (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and 
+		num_val(node) is None):
+		return(term_split(node.operand, -sign, tnodes))
+	
+	tnodes.append([sign, node])
+	return(1)
+
+# add a multiplicative factor to the term parameters, returning 0 if 
+# the factor is not of a supported form
+def factor_add(node, term, name_indx, J0):
+
+	# purely numeric factor
+	val = num_val(node)
+	if (val is not None):
+		term[0] = term[0]*val
+		return(1)
+
+	if (isinstance(node, ast.BinOp)):
+		if (isinstance(node.op, ast.Mult)):
+			if (factor_add(node.left, term, name_indx, J0) == 0):
+				return(0)
+			return(factor_add(node.right, term, name_indx, J0))
+		
+		# division only by a number
+		if (isinstance(node.op, ast.Div)):
+			val = num_val(node.right)
+			if (val is None or val == 0.):
+				return(0)
+			term[0] = term[0]/val
+			return(factor_add(node.left, term, name_indx, J0))
+
+		if (isinstance(node.op, ast.Pow)):
+			val = num_val(node.right)
+			if (val is None):
+				return(0)
+			# temperature dependence as TEMP**n or (TEMP/T0)**n
+			T0 = temp_ref(node.left)
+			if (T0 is not None):
+				if (term[3] != 0.): # only one temperature power per term
+					return(0)
+				term[2] = T0
+				term[3] = val
+				return(1)
+			# named value raised to a small positive integer power
+			if (val == int(val) and val > 0 and val < 5):
+				for i in range(int(val)):
+					if (factor_add(node.left, term, name_indx, J0) == 0):
+						return(0)
+				return(1)
+			return(0)
+	
+	# negated factor
+	if (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)):
+		term[0] = -term[0]
+		return(factor_add(node.operand, term, name_indx, J0))
+
+	# named value
+	if (isinstance(node, ast.Name)):
+		if (node.id == 'TEMP'): # temperature as a factor
+			if (term[3] != 0.):
+				return(0)
+			term[3] = 1.
+			return(1)
+		if (node.id in name_indx):
+			term[4].append(name_indx[node.id])
+			return(1)
+		return(0)
+	
+	# photolysis rate
+	if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) 
+		and node.value.id == 'J'):
+		sl = node.slice
+		if (isinstance(sl, ast.Index)): # python versions before 3.9
+			sl = sl.value
+		val = num_val(sl)
+		if (val is None or val != int(val) or val < 0):
+			return(0)
+		term[4].append(J0+int(val))
+		return(1)
+
+	# exponential of a number divided by temperature
+	if (isinstance(node, ast.Call) and len(node.args) == 1 and 
+		len(node.keywords) == 0 and isinstance(node.func, ast.Attribute) and 
+		isinstance(node.func.value, ast.Name) and 
+		node.func.value.id in ['numpy', 'np'] and node.func.attr == 'exp'):
+		val = num_val(node.args[0])
+		if (val is not None): # exponential of a number
+			term[0] = term[0]*np.exp(val)
+			return(1)
+		val = over_temp(node.args[0])
+		if (val is None):
+			return(0)
+		term[1] = term[1]+val
+		return(1)
+
+	return(0)
+
+# numerator of an expression of the form c/TEMP, None if not this form
+def over_temp(node):
+
+	if (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)):
+		val = over_temp(node.operand)
+		if (val is None):
+			return(None)
+		return(-val)
+	if (isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div) and 
+		isinstance(node.right, ast.Name) and node.right.id == 'TEMP'):
+		return(num_val(node.left))
+	return(None)
+
+# reference temperature of expressions of the form TEMP or TEMP/T0, 
+# None if not this form
+def temp_ref(node):
+
+	if (isinstance(node, ast.Name) and node.id == 'TEMP'):
+		return(1.)
+	if (isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div) and 
+		isinstance(node.left, ast.Name) and node.left.id == 'TEMP'):
+		val = num_val(node.right)
+		if (val is not None and val != 0.):
+			return(val)
+	return(None)
+
+# value of a purely numeric expression, None if not purely numeric
+def num_val(node):
+
+	for sub in ast.walk(node): # check only numbers and arithmetic
+		if not isinstance(sub, (ast.Constant, ast.BinOp, ast.UnaryOp, 
+			ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)):
+			return(None)
+		if (isinstance(sub, ast.Constant) and (isinstance(sub.value, bool) or 
+			not isinstance(sub.value, (int, float)))):
+			return(None)
+	try:
+		val = float(eval(compile(ast.Expression(node), '<rrc>', 'eval')))
+	except:
+		return(None)
+	if (np.isfinite(val) == False):
+		return(None)
+	return(val)
+
+def rrc_eval(v, TEMP, self):
+
+	# inputs: ---------------------------------------------
+	# v - named values (generic rate coefficients, inputs and 
+	#	photolysis rates) in the order given by self.rrc_tab_names, 
+	#	followed by one and then the photolysis rates
+	# TEMP - temperature (K)
+	# self.rrc_tab_refresh - flags of dependencies that have changed 
+	#	since the previous call (-1 for all)
+	# self.rrc_tab_ - term parameter tables from rrc_class
+	# -----------------------------------------------------
+
+	refresh = self.rrc_tab_refresh
+	if (self.rrc_tab_last is None): # if no previous values
+		refresh = -1
+		self.rrc_tab_last = np.zeros((self.rrc_tab_nreac))
+	
+	# set of terms to evaluate
+	if (refresh not in self.rrc_tab_sets):
+		self.rrc_tab_sets[refresh] = eval_set(refresh, self)
+	[ri, reac, A, v0, vx, Bi, B, ni, T0, n] = self.rrc_tab_sets[refresh]
+	
+	# value of every term, starting with the constant and first
+	# named value
+	tv = A*v[v0]
+	# any further named values
+	for [ti, vi] in vx:
+		tv[ti] *= v[vi]
+	# exponential temperature dependence
+	tv[Bi] *= np.exp(B/TEMP)
+	# power temperature dependence
+	tv[ni] *= (TEMP/T0)**n
+
+	# sum terms per refreshed reaction
+	self.rrc_tab_last[ri] = np.bincount(reac, weights = tv, minlength = len(ri))
+
+	return(self.rrc_tab_last.copy())
+
+# prepare the parameters of the terms of reactions with any of the 
+# given dependencies
+def eval_set(refresh, self):
+
+	# inputs: ---------------------------------------------
+	# refresh - dependency flags to refresh (-1 for all)
+	# self.rrc_tab_ - term parameter tables from rrc_class
+	# -----------------------------------------------------
+
+	if (refresh == -1): # all reactions
+		ri = np.arange(self.rrc_tab_nreac)
+	else:
+		ri = np.where((self.rrc_tab_dep & refresh) != 0)[0]
+	
+	# terms of these reactions
+	ti = np.where(np.isin(self.rrc_tab_reac, ri))[0]
+	# index of reactions relative to those refreshed
+	reac = np.searchsorted(ri, self.rrc_tab_reac[ti])
+	
+	A = self.rrc_tab_A[ti]
+	vindx = self.rrc_tab_vindx[ti, :]
+	
+	# note that evaluation is quickest when only the terms that need 
+	# an operation have it applied, so store subsets of terms:
+	# index of the first named value of every term
+	v0 = vindx[:, 0]
+	# term and named value indices for any further named values
+	vx = []
+	for si in range(1, vindx.shape[1]):
+		tsi = (np.where(vindx[:, si] != self.rrc_tab_one)[0]).astype('int')
+		vx.append([tsi, vindx[tsi, si]])
+	
+	# terms with exponential temperature dependence
+	Bi = (np.where(self.rrc_tab_B[ti] != 0.)[0]).astype('int')
+	B = self.rrc_tab_B[ti][Bi]
+	# terms with power temperature dependence
+	ni = (np.where(self.rrc_tab_n[ti] != 0.)[0]).astype('int')
+	T0 = self.rrc_tab_T0[ti][ni]
+	n = self.rrc_tab_n[ti][ni]
+	
+	return([ri, reac, A, v0, vx, Bi, B, ni, T0, n])
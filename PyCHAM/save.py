@@ -149,6 +149,11 @@ def saving(y_mat, Nresult_dry, Nresult_wet, t_out, num_comp,
 	#const["SMILES"] = self.rel_SMILES
 	const["factor_for_multiplying_ppb_to_get_molec/cm3_with_time"] = (Cfactor_vst.tolist())
 	const["simulation_computer_time(s)"] = time_taken
+	const["ode_solver"] = self.ode_solver
+	# counts of accepted steps, rejected steps, function evaluations, 
+	# Jacobian evaluations and LU decompositions by the ODE solver
+	if (hasattr(self, 'ode_cnts')):
+		const["ode_solver_counts_steps_rejected_fevals_jevals_lus"] = self.ode_cnts.tolist()
 	const["seed_name"] = self.seed_name
 	const["wall_on_flag_0forNO_>0forYES"] = self.wall_on
 	const["space_mode"] = self.space_mode
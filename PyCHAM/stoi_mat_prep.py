@@ -0,0 +1,89 @@
+##########################################################################################
+#                                                                                        #
+#    Copyright (C) 2018-2024 Simon O'Meara : simon.omeara@manchester.ac.uk               #
+#                                                                                        #
+#    All Rights Reserved.                                                                #
+#    This file is part of PyCHAM                                                         #
+#                                                                                        #
+#    PyCHAM is free software: you can redistribute it and/or modify it under             #
+#    the terms of the GNU General Public License as published by the Free Software       #
+#    Foundation, either version 3 of the License, or (at your option) any later          #
+#    version.                                                                            #
+#                                                                                        #
+#    PyCHAM is distributed in the hope that it will be useful, but WITHOUT               #
+#    ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS       #
+#    FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more              #
+#    details.                                                                            #
+#                                                                                        #
+#    You should have received a copy of the GNU General Public License along with        #
+#    PyCHAM.  If not, see <http://www.gnu.org/licenses/>.                                #
+#                                                                                        #
+##########################################################################################
+'''preparing the constant stoichiometry matrices for the ode solver'''
+# the net stoichiometry (product gain minus reactant loss) of every 
+# reaction is fixed for a simulation, so it is assembled once here as 
+# a compressed sparse row matrix, allowing the rate of change due to 
+# chemical reaction to be found in dydt by a single sparse matrix-vector 
+# product on the reaction rate vector
+
+import numpy as np
+import scipy.sparse as SP
+
+def stoi_mat_prep(self):
+
+	# inputs: --------------------------------------------------------------
+	# self.eqn_num - number of gas-phase, aqueous-phase and surface 
+	#	(e.g. wall) reactions
+	# self.y_rind_g - indices of concentration array for gas-phase reactants
+	# self.rr_arr_g - reaction rate array indices for gas-phase reactants
+	# self.rstoi_flat_g - flattened gas-phase reactant stoichiometries
+	# self.y_pind_g - indices of concentration array for gas-phase products
+	# self.rr_arr_p_g - reaction rate indices for gas-phase products
+	# self.pstoi_flat_g - flattened gas-phase product stoichiometries
+	# self.rindx_g - gas-phase reactant indices
+	# self.y_rind_aq, self.rr_arr_aq, self.rstoi_flat_aq, self.y_pind_aq,
+	#	self.rr_arr_p_aq, self.pstoi_flat_aq, self.rindx_aq - 
+	#	equivalents for aqueous-phase reactions (already tiled over 
+	#	particle size bins by aq_mat_prep)
+	# self - reference to PyCHAM
+	# ----------------------------------------------------------------------
+
+	if (self.eqn_num[0] > 0): # if gas-phase reactions present
+		self.stoi_net_g = stoi_net(self.y_rind_g, self.rr_arr_g, 
+			self.rstoi_flat_g, self.y_pind_g, self.rr_arr_p_g, 
+			self.pstoi_flat_g, self.rindx_g.shape[0])
+
+	if (self.eqn_num[1] > 0): # if particle-phase reactions present
+		self.stoi_net_aq = stoi_net(self.y_rind_aq, self.rr_arr_aq, 
+			self.rstoi_flat_aq, self.y_pind_aq, self.rr_arr_p_aq, 
+			self.pstoi_flat_aq, self.rindx_aq.shape[0])
+
+	return()
+
+def stoi_net(y_rind, rr_arr, rstoi_flat, y_pind, rr_arr_p, pstoi_flat, nreac):
+
+	# inputs: --------------------------------------------------------------
+	# y_rind - concentration array indices of reactants
+	# rr_arr - reaction indices of reactants
+	# rstoi_flat - reactant stoichiometries
+	# y_pind - concentration array indices of products
+	# rr_arr_p - reaction indices of products
+	# pstoi_flat - product stoichiometries
+	# nreac - number of reactions (columns of matrix)
+	# ----------------------------------------------------------------------
+
+	# rows are components in concentration array, columns are reactions,
+	# reactants enter negatively and products positively
+	rows = np.concatenate((y_rind, y_pind)).astype('int')
+	cols = np.concatenate((rr_arr, rr_arr_p)).astype('int')
+	data = np.concatenate((-1.*rstoi_flat, pstoi_flat)).astype('float')
+	
+	# only need as many rows as the highest component index affected
+	nrow = int(rows.max())+1 if (len(rows) > 0) else 0
+	
+	# duplicate entries (e.g. a component that is both reactant and 
+	# product of a reaction) are summed on conversion to row format
+	stoi = SP.coo_matrix((data, (rows, cols)), shape = (nrow, nreac)).tocsr()
+	stoi.sum_duplicates()
+	
+	return(stoi)
@@ -187,6 +187,11 @@ def ui_check(self):
 			self.pars_skip = 0
 		
 
+	# check on ODE solver ---------------------------------------------
+	if (self.ode_solver not in ['BDF', 'LSODA', 'Rosenbrock'] and em_flag < 2):
+		err_mess = str('Error - the method for integrating the ODEs (ode_solver in the model variables file) is ' + str(self.ode_solver) + ', but must be one of: BDF, LSODA or Rosenbrock, please see the guidelines in README')
+		em_flag = 2
+
 	# check on gas-wall partitioning inputs ---------------------------------
 	# check that number of effective absorbing masses for walls matches number of walls
 	if len(self.Cw)!=self.wall_on and self.wall_on > 0:
@@ -0,0 +1,62 @@
+'''unit test for the ODE integration methods'''
+# integrates the stiff Robertson problem over several intervals with
+# each of the methods selectable by the ode_solver model variable,
+# reporting the final concentrations and the counts of steps and
+# evaluations
+# assumes calling from the PyCHAM home folder
+print('unit test for the ODE integration methods, the printed concentrations should agree between methods to within the tolerances (approximately 4.505e-01, 3.223e-06, 5.495e-01)')
+
+import os
+import sys
+dir_path = os.getcwd() # current working directory
+# temporarily add the PyCHAM folder to path
+sys.path.append(str(dir_path+'/PyCHAM'))
+
+import ode_integ
+import numpy as np
+import scipy.sparse as SP
+
+# define function
+def test_ode_integ():
+
+	# rate of change, with concentrations in a column as
+	# for PyCHAM
+	def dydt(t, y):
+		y1 = y[0, :]; y2 = y[1, :]; y3 = y[2, :]
+		dd = np.zeros((3, y.shape[1]))
+		dd[0, :] = -0.04*y1+1.e4*y2*y3
+		dd[1, :] = 0.04*y1-1.e4*y2*y3-3.e7*y2**2.
+		dd[2, :] = 3.e7*y2**2.
+		return(dd)
+
+	# sparse Jacobian
+	def jac(t, y):
+		y = y.reshape(-1)
+		j = np.array(([-0.04, 1.e4*y[2], 1.e4*y[1]],
+			[0.04, -1.e4*y[2]-6.e7*y[1], -1.e4*y[1]],
+			[0., 6.e7*y[1], 0.]))
+		return(SP.csc_matrix(j))
+
+	# self placeholder
+	class testobj():
+		pass
+
+	for meth in ['BDF', 'LSODA', 'Rosenbrock']:
+
+		self = testobj()
+		self.ode_solver = meth
+
+		y = np.array((1., 0., 0.))
+		for it in range(10): # intervals
+			[y, t_end, status] = ode_integ.ode_integ(dydt, jac, y, 40.,
+				1.e-10, 1.e-6, self)
+			if (status == -1):
+				print(meth, ' integration failed')
+				break
+
+		print(meth, ' concentrations: ', y)
+		print(meth, ' steps, rejected steps, function evaluations, Jacobian evaluations and LU decompositions: ', self.ode_cnts)
+
+	return()
+
+test_ode_integ() # call function
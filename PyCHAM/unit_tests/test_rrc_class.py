@@ -0,0 +1,70 @@
+'''unit test for array evaluation of reaction rate coefficients'''
+# compares rate coefficients from the parameter tables of rrc_class
+# against direct evaluation of the expressions, both for a full 
+# evaluation and for a refresh of only the RO2-dependent reactions
+# assumes calling from the PyCHAM home folder
+print('unit test for array evaluation of reaction rate coefficients, the printed relative differences should be close to zero and the custom expressions should be reported with dependency flag 32')
+
+import os
+import sys
+dir_path = os.getcwd() # current working directory
+# temporarily add the PyCHAM folder to path
+sys.path.append(str(dir_path+'/PyCHAM'))
+
+import rrc_class
+import numpy
+import numpy as np
+
+# define function
+def test_rrc_class():
+
+	# self placeholder
+	class testobj():
+		pass
+	self = testobj()
+
+	# example expressions in the form given by eqn_interr
+	reac_coef = ['1.2e-11*numpy.exp(440/TEMP)', 'J[1]+J[2]*0.5', 
+		'KRO2NO*0.2', '5.6e-34*N2*(TEMP/300)**-2.6', '2.5e-12', 
+		'1.0e-30*numpy.exp(1.0e8/TEMP**3)', 'KMT06/KMT07', '1.e-5*H2O**2',
+		'8.8e-13*RO2*numpy.exp(-(300/TEMP))+4.e-14']
+	# generic rate coefficient expressions and names
+	rrc = ['KRO2NO = 2.7e-12*numpy.exp(360/TEMP)', 'KMT06 = 2.', 
+		'KMT07 = 3.*KMT06']
+	rrc_name = ['KRO2NO', 'KMT06', 'KMT07']
+
+	code_indx = rrc_class.rrc_class(reac_coef, rrc, rrc_name, self)
+
+	# values of named inputs
+	TEMP = 290.; KRO2NO = 2.7e-12*numpy.exp(360/TEMP); KMT06 = 2.
+	KMT07 = 3.*KMT06; RO2 = 1.e8
+	H2O = 4.e17; M = 2.5e19; N2 = M*0.7809; O2 = M*0.2095; NO = 1.e9
+	HO2 = 1.e8; NO3 = 1.e7; J = [1.e-5, 2.e-4, 3.e-3]
+
+	v = numpy.concatenate((numpy.array([KRO2NO, KMT06, KMT07, RO2, H2O, M, 
+		N2, O2, NO, HO2, NO3, 1.]), J))
+	rate_values = rrc_class.rrc_eval(v, TEMP, self)
+
+	print('reactions left as code: ', code_indx)
+	print('dependency flags per reaction: ', self.rrc_tab_dep)
+	for ri in range(len(reac_coef)):
+		if ri in code_indx:
+			continue
+		print(reac_coef[ri], ' relative difference: ', 
+			rate_values[ri]/eval(reac_coef[ri])-1.)
+
+	# change RO2 and refresh only the reactions depending on it
+	RO2 = 3.e8
+	v[len(rrc_name)] = RO2
+	self.rrc_tab_refresh = 4
+	rate_values = rrc_class.rrc_eval(v, TEMP, self)
+	print('after refresh of RO2-dependent reactions:')
+	for ri in range(len(reac_coef)):
+		if ri in code_indx:
+			continue
+		print(reac_coef[ri], ' relative difference: ', 
+			rate_values[ri]/eval(reac_coef[ri])-1.)
+
+	return()
+
+test_rrc_class() # call function
@@ -70,12 +70,12 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('#                                                                                        #\n')
 	f.write('##########################################################################################\n')
 	f.write('\'\'\'solution of ODEs, generated by eqn_pars.py\'\'\'\n')
-	f.write('# module to solve system of ordinary differential equations (ODEs) using solve_ivp of Scipy \n')
+	f.write('# module to solve system of ordinary differential equations (ODEs) using the BDF method of Scipy \n')
 	f.write('# File Created at %s\n' %(datetime.datetime.now()))	
 	f.write('\n')
 	f.write('import numpy as np\n')
 	f.write('import scipy.sparse as SP\n')
-	f.write('from scipy.integrate import solve_ivp\n')
+	f.write('import ode_integ\n')
 	f.write('\n')	
 	f.write('# define function\n')
 	f.write('def ode_solv(y, integ_step, rrc, \n')
@@ -99,6 +99,11 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('	# self.njac_g - number of Jacobian elements affected per equation\n')
 	f.write('	# self.jac_den_indx_g - index of component denominators for Jacobian\n')
 	f.write('	# self.jac_indx_g - index of Jacobian to place elements per equation (rows)\n')
+	f.write('	# self.jac_rindx_g - index of reactants per equation, with fillers as -1\n')
+	f.write('	# self.jac_rr_indx_g - equation index per gas-phase Jacobian element\n')
+	f.write('	# self.jac_stoi_flat_g - stoichiometry per gas-phase Jacobian element\n')
+	f.write('	# self.jac_den_flat_g - denominator component per gas-phase Jacobian element\n')
+	f.write('	# self.jac_data_indx_g - sparse Jacobian index per gas-phase Jacobian element\n')
 	f.write('	# Cinfl_now - influx of components with continuous influx \n')
 	f.write('	#		(# molecules/cm3/s)\n')
 	f.write('	# self.y_arr_g - index for matrix used to arrange concentrations of gas-phase reactants, \n')
@@ -108,6 +113,8 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('	# self.uni_y_rind_g - unique index of reactants \n')
 	f.write('	# self.y_pind_g - index of y relating to products\n')
 	f.write('	# self.uni_y_pind_g - unique index of products \n')
+	f.write('	# self.stoi_net_g - net stoichiometry matrix (components by reactions) for gas-phase reactions\n')
+	f.write('	# self.stoi_net_aq - net stoichiometry matrix (components by reactions) for particle-phase reactions\n')
 	f.write('	# self.reac_col_g - column indices for sparse matrix of reaction losses\n')
 	f.write('	# self.prod_col_g - column indices for sparse matrix of production gains\n')
 	f.write('	# self.rstoi_flat_g - 1D array of reactant stoichiometries per equation\n')
@@ -211,18 +218,9 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 		f.write('		rrc_y = rrc_y.reshape(self.rindx_g.shape[0], self.rindx_g.shape[1], order = \'C\')\n')
 		f.write('		# reaction rate (molecules/cm3/s) \n')
 		f.write('		rr = rrc[0:self.rindx_g.shape[0]]*((rrc_y**self.rstoi_g).prod(axis=1))\n')
-		f.write('		# loss of reactants\n')
-		f.write('		data = rr[self.rr_arr_g]*self.rstoi_flat_g # prepare loss values\n')
-		f.write('		# convert to sparse matrix\n')
-		f.write('		loss = SP.csc_matrix((data, self.y_rind_g, self.reac_col_g))\n')
-		f.write('		# register loss of reactants\n')
-		f.write('		dd[self.uni_y_rind_g, 0] -= np.array((loss.sum(axis = 1))[self.uni_y_rind_g])[:, 0]\n')
-		f.write('		# gain of products\n')
-		f.write('		data = rr[self.rr_arr_p_g]*self.pstoi_flat_g # prepare loss values\n')
-		f.write('		# convert to sparse matrix\n')
-		f.write('		loss = SP.csc_matrix((data, self.y_pind_g, self.prod_col_g))\n')
-		f.write('		# register gain of products\n')
-		f.write('		dd[self.uni_y_pind_g, 0] += np.array((loss.sum(axis = 1))[self.uni_y_pind_g])[:, 0]\n')
+		f.write('		# loss of reactants and gain of products through the constant\n')
+		f.write('		# net stoichiometry matrix (prepared in stoi_mat_prep)\n')
+		f.write('		dd[0:self.stoi_net_g.shape[0], 0] += self.stoi_net_g.dot(rr)\n')
 		f.write('		\n')
 
 	if (self.eqn_num[1] > 0): # if particle-phase reactions present
@@ -238,18 +236,9 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 		f.write('		rrc_y = rrc_y.reshape(self.rindx_aq.shape[0], self.rindx_aq.shape[1], order = \'C\')\n')
 		f.write('		# reaction rate (# molecules/cm3/s) \n')
 		f.write('		rr = rr_aq*((rrc_y**self.rstoi_aq).prod(axis=1))\n')
-		f.write('		# loss of reactants\n')
-		f.write('		data = rr[self.rr_arr_aq]*self.rstoi_flat_aq # prepare loss values\n')
-		f.write('		# convert to sparse matrix\n')
-		f.write('		loss = SP.csc_matrix((data, self.y_rind_aq, self.reac_col_aq))\n')
-		f.write('		# register loss of reactants\n')
-		f.write('		dd[self.uni_y_rind_aq, 0] -= np.array((loss.sum(axis = 1))[self.uni_y_rind_aq])[:, 0]\n')
-		f.write('		# gain of products\n')
-		f.write('		data = rr[self.rr_arr_p_aq]*self.pstoi_flat_aq # prepare loss values\n')
-		f.write('		# convert to sparse matrix\n')
-		f.write('		loss = SP.csc_matrix((data, self.y_pind_aq, self.prod_col_aq))\n')
-		f.write('		# register gain of products\n')
-		f.write('		dd[self.uni_y_pind_aq, 0] += np.array((loss.sum(axis = 1))[self.uni_y_pind_aq])[:, 0]\n')
+		f.write('		# loss of reactants and gain of products through the constant\n')
+		f.write('		# net stoichiometry matrix (prepared in stoi_mat_prep)\n')
+		f.write('		dd[0:self.stoi_net_aq.shape[0], 0] += self.stoi_net_aq.dot(rr)\n')
 		f.write('		\n')
 
 	if (self.eqn_num[2] > 0): # if surface reactions present
@@ -429,16 +418,22 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('		\n')
 	
 	if (self.eqn_num[0] > 0): # if gas-phase reactions present
-		f.write('		for i in range(self.rindx_g.shape[0]): # gas-phase reaction loop\n')
-		f.write('			# reaction rate (# molecules/cm3/s)\n')
-		f.write('			rr = rrc[i]*(y[self.rindx_g[i, 0:self.nreac_g[i]], 0].prod())\n')
-		f.write('			# prepare Jacobian inputs\n')
-		f.write('			jac_coeff = np.zeros((self.njac_g[i, 0]))\n')
-		f.write('			# only fill Jacobian if reaction rate sufficient\n')
-		f.write('			if (rr != 0.):\n')
-		f.write('				jac_coeff = (rr*(self.jac_stoi_g[i, 0:self.njac_g[i, 0]])/\n')
-		f.write('				(y[self.jac_den_indx_g[i, 0:self.njac_g[i, 0]], 0]))\n')
-		f.write('			data[self.jac_indx_g[i, 0:self.njac_g[i, 0]]] += jac_coeff\n')
+		f.write('		# gas-phase reactions, all at once using the scatter map\n')
+		f.write('		# prepared in jac_setup\n')
+		f.write('		# concentrations with a value of one appended for filler reactants\n')
+		f.write('		y_ext = np.append(y[:, 0], 1.)\n')
+		f.write('		# reaction rate (# molecules/cm3/s)\n')
+		f.write('		rr = rrc[0:self.rindx_g.shape[0]]*(y_ext[self.jac_rindx_g].prod(axis=1))\n')
+		f.write('		# spread reaction rates over their Jacobian elements\n')
+		f.write('		rr = rr[self.jac_rr_indx_g]\n')
+		f.write('		# prepare Jacobian inputs\n')
+		f.write('		jac_coeff = np.zeros((len(rr)))\n')
+		f.write('		# only fill Jacobian where reaction rate sufficient\n')
+		f.write('		nzi = (rr != 0.)\n')
+		f.write('		jac_coeff[nzi] = (rr[nzi]*self.jac_stoi_flat_g[nzi]/\n')
+		f.write('			y[self.jac_den_flat_g[nzi], 0])\n')
+		f.write('		# sum into Jacobian, repeated indices accumulate in reaction order\n')
+		f.write('		np.add.at(data, self.jac_data_indx_g, jac_coeff)\n')
 		f.write('		\n')
 	
 	if (self.eqn_num[1] > 0): # if particle-phase reactions present
@@ -574,14 +569,15 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('	\n')
 	f.write('	# call on the ODE solver, note y contains the initial condition(s) (molecules/cm3 (air)) and must be 1D even though y in dydt and jac has shape (number of elements, 1)\n')
 	
-	f.write('	sol = solve_ivp(dydt, [0, integ_step], y, atol = atol, rtol = rtol, method = \'BDF\', t_eval = [integ_step], vectorized = True, jac = jac)\n')
+	f.write('	# integration is warm-started from the step size and history at the end of the previous interval, unless reset by ode_updater\n')
+	f.write('	[y_end, t_end, status] = ode_integ.ode_integ(dydt, jac, y, integ_step, atol, rtol, self)\n')
 	f.write('	\n')
-	f.write('	if (sol.status == -1): # if integration step failed, then we want to reduce the time step and try again \n')
+	f.write('	if (status == -1): # if integration step failed, then we want to reduce the time step and try again \n')
 	f.write('		y[0] = -1.e6\n')
 	f.write('	else:\n')	
 	f.write('		# force all components in size bins with no particle to zero\n')
 	
-	f.write('		y = np.squeeze(sol.y)\n')
+	f.write('		y = np.squeeze(y_end)\n')
 	
 	f.write('		y = y.reshape(num_sb+1, num_comp)\n')
 	f.write('		if (num_asb > 0):\n')
@@ -590,5 +586,5 @@ def ode_gen(int_tol, rowvals, num_comp, num_asb, testf, self):
 	f.write('		y = y.flatten()\n')
 	f.write('		\n')
 	f.write('	# return concentration(s) and time(s) following integration\n')
-	f.write('	return(y, sol.t)\n')
+	f.write('	return(y, np.array([t_end]))\n')
 	f.close() # close file
@@ -23,6 +23,7 @@
 # function to generate a module for calculation of reaction rate coefficients
 
 import datetime
+import rrc_class
 
 def write_rate_file(rrc, rrc_name, testf, self): # define function
 	
@@ -72,6 +73,7 @@ def write_rate_file(rrc, rrc_name, testf, self): # define function
 	f.write('\n')
 	f.write('import numpy\n')
 	f.write('import photolysisRates\n')
+	f.write('import rrc_class\n')
 	f.write('\n')
 
 	# following part is the function (there should be an indent at the start of each line)
@@ -129,12 +131,26 @@ def write_rate_file(rrc, rrc_name, testf, self): # define function
 		f.write('	# if reactions have been found in the chemical scheme\n')
 		f.write('	# gas-phase reactions\n')
 		f.write('	gprn = 0 # keep count on reaction number\n')
+		f.write('	rc_eq_now = \'array-evaluated reactions (rrc_class.py)\'\n')
 		f.write('	try:\n') # in case there are any issues with calculating a rate coefficient
-		for eqn_key in range (len(self.reac_coef_g)):
-			f.write('		gprn += 1 # keep count on reaction number\n')
-			f.write('		# remember equation in case needed for error reporting\n')
-			f.write('		rc_eq_now = \'%s\' \n' %(self.reac_coef_g[eqn_key]))
-			f.write('		rate_values[%s] = %s\n' %(eqn_key, self.reac_coef_g[eqn_key]))
+		if (len(self.reac_coef_g) > 0):
+			# classify expressions into parameter tables, 
+			# leaving custom expressions as code
+			code_indx = rrc_class.rrc_class(self.reac_coef_g, rrc, rrc_name, self)
+			
+			f.write('		# values that terms of rate coefficients may be multiplied by\n')
+			f.write('		rrc_v = numpy.concatenate((numpy.array([%s, 1.]), J))\n' %(', '.join(self.rrc_tab_names)))
+			f.write('		# rate coefficients of reactions in parameter tables\n')
+			f.write('		rate_values[0:%i] = rrc_class.rrc_eval(rrc_v, TEMP, self)\n' %(len(self.reac_coef_g)))
+			if (len(code_indx) > 0):
+				f.write('		# custom rate coefficient expressions\n')
+			for eqn_key in code_indx:
+				f.write('		gprn = %i # keep count on reaction number\n' %(eqn_key+1))
+				f.write('		# remember equation in case needed for error reporting\n')
+				f.write('		rc_eq_now = \'%s\' \n' %(self.reac_coef_g[eqn_key]))
+				f.write('		rate_values[%s] = %s\n' %(eqn_key, self.reac_coef_g[eqn_key]))
+		else:
+			f.write('		pass\n')
 		f.write('	except:\n') # in case there are any issues with calculating a rate coefficient
 		f.write('		erf = 1 # flag error\n')
 		f.write('		err_mess = (str(\'Error: Could not calculate rate coefficient for equation number \' + str(gprn) + \' \' + rc_eq_now + \' (message from rate coeffs.py)\'))\n')
@@ -155,4 +171,9 @@ def write_rate_file(rrc, rrc_name, testf, self): # define function
 	f.write('	return(rate_values, erf, err_mess)\n')
 	f.close()
 
+	if (testf == 0):
+		# flag that any cached rate coefficient function (rrc_calc) is 
+		# out of date
+		self.rrc_stamp = None
+
 	return()